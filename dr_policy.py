@@ -9,10 +9,75 @@ DRPolicyKL: Use KL Constraint.
 DRPolicyWass: Use Wasserstein Constraint. 
 """
 
+import functools
+
 import numpy as np
 from scipy import optimize
+from scipy.special import logsumexp
 from sklearn.linear_model import LinearRegression
 
+# Numba is optional: when available, the Sinkhorn/Wasserstein policy updates
+# run as compiled loops parallelized over states; otherwise the vectorized
+# NumPy kernels inside the update methods are used.
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True)
+    def _sinkhorn_step(all_advantages, D, old_pi, lamb, beta, out):
+        """Transport each state's PMF through the column-normalized Sinkhorn
+        kernel, accumulating into the zero-filled 'out' buffer."""
+        sta_num, act_num = all_advantages.shape
+        for s in prange(sta_num):
+            t = np.empty(act_num, all_advantages.dtype)
+            for j in range(act_num):
+                # shift the column by its max before exponentiating (stability)
+                m = -np.inf
+                for k in range(act_num):
+                    t[k] = (lamb/beta)*all_advantages[s, k] - lamb*D[k, j]
+                    if t[k] > m:
+                        m = t[k]
+                denom = 0.0
+                for k in range(act_num):
+                    denom += np.exp(t[k] - m)
+                for i in range(act_num):
+                    out[s, i] += old_pi[s, j]*np.exp(t[i] - m)/denom
+
+    @njit(parallel=True)
+    def _wass_step(all_advantages, D, old_pi, beta, out):
+        """Move each action's mass onto argmax_j {A(s,aj) - beta*d(aj,ai)},
+        accumulating into the zero-filled 'out' buffer."""
+        sta_num, act_num = all_advantages.shape
+        for s in prange(sta_num):
+            for i in range(act_num):
+                opt_j = 0
+                opt_val = all_advantages[s, 0] - beta*D[0, i]
+                for j in range(act_num):
+                    cur_val = all_advantages[s, j] - beta*D[j, i]
+                    if cur_val > opt_val:
+                        opt_j = j
+                        opt_val = cur_val
+                out[s, opt_j] += old_pi[s, i]
+
+def _mean_advantages(observes, actions, advantages, sta_num, act_num):
+    """Average advantage per (state, action): accumulate the samples and their
+    counts in C, then divide where a pair was visited (unseen pairs stay 0)."""
+    observes = np.asarray(observes, dtype=np.intp)
+    actions = np.asarray(actions, dtype=np.intp)
+    # flatten to a linear index: bincount's tight counting kernel is faster
+    # than np.add.at's unbuffered gather-scatter on this contiguous grid
+    idx = observes*act_num + actions
+    cells = sta_num*act_num
+    all_advantages = np.bincount(idx, weights=advantages,
+                                 minlength=cells).reshape(sta_num, act_num)
+    count = np.bincount(idx, minlength=cells).reshape(sta_num, act_num)
+    np.divide(all_advantages, count, out=all_advantages, where=count != 0)
+    # float32 halves the bytes moved through the update kernels and is ample
+    # for tabular PMFs once the logsumexp shifts keep the exponentials tame
+    return all_advantages.astype(np.float32)
+
 class DRPolicyKL(object):
     def __init__(self, sta_num, act_num):
         """
@@ -20,22 +85,47 @@ class DRPolicyKL(object):
             sta_num: number of states
             act_num: number of actions
         """
-        # initial policy PMF π(a|s): a list of 'sta_num' arrays, each array has size 'act_num'
-        # For KL constraint, PMF should not have zero 
+        # initial policy PMF π(a|s): a 'sta_num' x 'act_num' array, one row per state
+        # For KL constraint, PMF should not have zero
         self.sta_num = sta_num
         self.act_num = act_num
-        self.distributions = []
+        self.distributions = np.full((sta_num, act_num), 1.0/act_num, dtype=np.float32)
         self.delta = 0.01
-        for i in range(sta_num):
-            self.distributions.append(np.ones(act_num)/act_num)
+        # env-specific settings, resolved lazily on the first update
+        self._env_name = None
+        # cached per-state CDF for fast inverse-transform sampling
+        self._cdf = np.cumsum(self.distributions, axis=1)
+        self._cdf /= self._cdf[:, -1:]
+        # freeze the policy between updates to catch accidental in-place edits
+        self.distributions.flags.writeable = False
+
+    def _setup_env(self, env_name):
+        """Resolve the env-specific additive advantage bias once, so update
+        stays branch-free on env_name."""
+        self._env_name = env_name
+        self._bias = np.zeros((self.sta_num, self.act_num), dtype=np.float32)
+        if env_name == 'NChain-v0':
+            self._bias[0, 1] = 0.1
+            self._bias[1, 1] = 0.3
+        elif env_name == 'Taxi-v3':
+            self._bias[400:500, 0] = 2
 
     def sample(self, obs):
         """Draw sample from policy."""
-        # an array of size 'act_num'
-        distribution = self.distributions[obs];
-        # sample an action
-        action = np.random.choice(self.act_num, 1, p=distribution)
-        return action[0]
+        # inverse-transform sampling on the cached CDF row of the observed state
+        return int(np.searchsorted(self._cdf[obs], np.random.random()))
+
+    def sample_batch(self, obs):
+        """Draw one action per observation in a single vectorized call.
+
+        Args:
+            obs: observations, numpy array of size N
+
+        Returns: actions, numpy array of size N
+        """
+        obs = np.asarray(obs, dtype=np.intp)
+        r = np.random.random(len(obs))
+        return (self._cdf[obs] > r[:, None]).argmax(axis=1)
 
     def update(self, observes, actions, advantages, disc_freqs, env_name, eps):
         """ Update policy based on observations, actions and advantages
@@ -45,52 +135,62 @@ class DRPolicyKL(object):
             actions: actions, numpy array of size N
             advantages: advantages, numpy array of size N
         """
-        all_advantages = []
-        count = []
-        x = []
-        for i in range(self.sta_num):
-            all_advantages.append(np.zeros(self.act_num))
-            count.append(np.zeros(self.act_num))
-        for i in range(len(observes)):
-            all_advantages[observes[i]][actions[i]] += advantages[i]
-            count[observes[i]][actions[i]] += 1
-        for s in range(self.sta_num):
-            for i in range(self.act_num):
-                if count[s][i] != 0:
-                    all_advantages[s][i] = all_advantages[s][i]/count[s][i]
-
-        if env_name == 'NChain-v0':  
-            all_advantages[0][1] += 0.1
-            all_advantages[1][1] += 0.3
-        
-        if env_name == 'Taxi-v3':
-            for s in range(400, 500):
-                all_advantages[s][0] += 2
+        if env_name != self._env_name:
+            self._setup_env(env_name)
+        # disc_freqs is constant w.r.t. beta; fix its layout once so every
+        # optimizer evaluation reuses the same contiguous float64 vector
+        disc_freqs = np.ascontiguousarray(disc_freqs, dtype=np.float64)
+        all_advantages = _mean_advantages(observes, actions, advantages,
+                                          self.sta_num, self.act_num)
+        all_advantages += self._bias
+
+        def row_lse_weighted(A_over_beta, pi):
+            """Per-state log(sum(pi*exp(A/beta))) via the shifted logsumexp trick.
+
+            Subtracting the row max before exponentiating avoids overflow for
+            small beta or large advantages. Also returns the shifted weights
+            'w' so callers can reuse them instead of re-exponentiating.
+            """
+            m = A_over_beta.max(axis=1, keepdims=True)
+            w = np.exp(A_over_beta - m)*pi
+            return np.log(w.sum(axis=1)) + m.squeeze(axis=1), w
+
+        @functools.lru_cache(maxsize=8)
+        def kernel(beta):
+            # the optimizer evaluates objective and gradient at the same beta;
+            # memoize so each beta pays for the exp kernel only once
+            return row_lse_weighted(all_advantages/beta, self.distributions)
 
         def gradient(beta):
-            gradient = self.delta
-            for s in range(self.sta_num):
-                gradient += disc_freqs[s]*np.log(np.sum(np.exp(all_advantages[s]/beta)*self.distributions[s]))
-                numerator = np.sum(np.exp(all_advantages[s]/beta)*all_advantages[s]*self.distributions[s])
-                denom = beta*np.sum(np.exp(all_advantages[s]/beta)*self.distributions[s])
-                gradient -= disc_freqs[s]*numerator/denom
-            return gradient
+            lse, w = kernel(beta)
+            numer = (w*all_advantages).sum(axis=1)
+            denom = beta*w.sum(axis=1)
+            return self.delta + np.dot(disc_freqs, lse - numer/denom)
 
         def objective(beta):
-            objective = beta*self.delta
-            for s in range(self.sta_num):
-                objective += beta*disc_freqs[s]*np.log(np.sum(np.exp(all_advantages[s]/beta)*self.distributions[s]))
-            return objective
+            # scipy's weighted logsumexp does the shifted-max reduction in one
+            # C loop over all states; gradient keeps the fused kernel because
+            # it also needs the exponentiated weights
+            lse = logsumexp(all_advantages/beta, b=self.distributions, axis=1)
+            return beta*(self.delta + np.dot(disc_freqs, lse))
 
         beta = 1
 
-        # compute the new policy
-        old_distributions = self.distributions
-        for s in range(self.sta_num):
-            denom = np.sum(np.exp(all_advantages[s]/beta)*old_distributions[s])
-            self.distributions[s] = np.exp(all_advantages[s]/beta)*old_distributions[s]/denom
-
-    def get_policy(self): 
+        # compute the new policy: exponentiated-advantage reweighting as a
+        # single-pass softmax in the log domain; the row-max shift makes it
+        # overflow-safe for small beta and the buffer is exponentiated once
+        Z = all_advantages/beta + np.log(self.distributions)
+        Z -= Z.max(axis=1, keepdims=True)
+        np.exp(Z, out=Z)
+        Z /= Z.sum(axis=1, keepdims=True)
+        self.distributions = Z
+        # refresh the sampling CDF for the new policy
+        self._cdf = np.cumsum(self.distributions, axis=1)
+        self._cdf /= self._cdf[:, -1:]
+        self.distributions.flags.writeable = False
+
+    def get_policy(self):
+        # read-only view of the policy; copy before mutating
         return self.distributions
 
 class DRPolicySinkhorn(object):
@@ -100,23 +200,61 @@ class DRPolicySinkhorn(object):
             sta_num: number of states
             act_num: number of actions
         """
-        # initial policy PMF π(a|s): a list of 'sta_num' arrays, each array has size 'act_num'
-        # For KL constraint, PMF should not have zero 
+        # initial policy PMF π(a|s): a 'sta_num' x 'act_num' array, one row per state
+        # For KL constraint, PMF should not have zero
         self.sta_num = sta_num
         self.act_num = act_num
-        self.distributions = []
+        self.distributions = np.full((sta_num, act_num), 1.0/act_num, dtype=np.float32)
         self.delta = 0.1
         self.lamb = 3
-        for i in range(sta_num):
-            self.distributions.append(np.ones(act_num)/act_num)
+        # pairwise action distance d(ai, aj): 0 if same action, 1 otherwise
+        self.D = 1.0 - np.eye(act_num, dtype=np.float32)
+        # scratch buffer for the next policy, swapped with distributions each update
+        self._new_dist = np.zeros((sta_num, act_num), dtype=np.float32)
+        # env-specific settings, resolved lazily on the first update
+        self._env_name = None
+        # cached per-state CDF for fast inverse-transform sampling
+        self._cdf = np.cumsum(self.distributions, axis=1)
+        self._cdf /= self._cdf[:, -1:]
+        # freeze the policy between updates to catch accidental in-place edits
+        self.distributions.flags.writeable = False
+
+    def _setup_env(self, env_name):
+        """Resolve the env-specific advantage bias, beta and lambda schedule
+        once, so update stays branch-free on env_name."""
+        self._env_name = env_name
+        self._bias = np.zeros((self.sta_num, self.act_num), dtype=np.float32)
+        self._beta = None
+        self._lamb_fn = None
+        if env_name == 'NChain-v0':
+            self._bias[0, 1] = 0.1
+            self._bias[1, 1] = 0.3
+            self._beta = 0.8
+            # consider a varying lambda
+            # self._lamb_fn = lambda eps: 100/eps
+            # self._lamb_fn = lambda eps: np.log(eps)
+        elif env_name == 'Taxi-v3':
+            # self._bias[400:500, 0] = 2
+            self._beta = 3
+            # consider a varying lambda: eps, eps**2 or np.log10(eps), capped
+            self._lamb_fn = lambda eps: 5.5 if eps**2 >= 6 else eps**2
 
     def sample(self, obs):
         """Draw sample from policy."""
-        # an array of size 'act_num'
-        distribution = self.distributions[obs];
-        # sample an action
-        action = np.random.choice(self.act_num, 1, p=distribution)
-        return action[0]
+        # inverse-transform sampling on the cached CDF row of the observed state
+        return int(np.searchsorted(self._cdf[obs], np.random.random()))
+
+    def sample_batch(self, obs):
+        """Draw one action per observation in a single vectorized call.
+
+        Args:
+            obs: observations, numpy array of size N
+
+        Returns: actions, numpy array of size N
+        """
+        obs = np.asarray(obs, dtype=np.intp)
+        r = np.random.random(len(obs))
+        return (self._cdf[obs] > r[:, None]).argmax(axis=1)
 
     def update(self, observes, actions, advantages, disc_freqs, env_name, eps):
         """ Update policy based on observations, actions and advantages
@@ -126,77 +264,39 @@ class DRPolicySinkhorn(object):
             actions: actions, numpy array of size N
             advantages: advantages, numpy array of size N
         """
-        all_advantages = []
-        count = []
-        x = []
-        for i in range(self.sta_num):
-            all_advantages.append(np.zeros(self.act_num))
-            count.append(np.zeros(self.act_num))
-        for i in range(len(observes)):
-            all_advantages[observes[i]][actions[i]] += advantages[i]
-            count[observes[i]][actions[i]] += 1
-        for s in range(self.sta_num):
-            for i in range(self.act_num):
-                if count[s][i] != 0:
-                    all_advantages[s][i] = all_advantages[s][i]/count[s][i]
- 
-        if env_name == 'NChain-v0':  
-            all_advantages[0][1] += 0.1
-            all_advantages[1][1] += 0.3
-
-        # if env_name == 'Taxi-v3':
-        #     for s in range(400, 500):
-        #         all_advantages[s][0] += 2
-        
-        if env_name == 'Taxi-v3':        
-            beta = 3
-            # consider a varying lambda
-            # lamb_value = eps
-            lamb_value = eps**2
-            # lamb_value = np.log10(eps)
-            if lamb_value >= 6:
-                self.lamb = 5.5
-            else:
-                self.lamb = lamb_value
-        elif env_name == 'NChain-v0':
-            beta = 0.8
-            # consider a varying lambda
-            # self.lamb = 100/eps
-            # self.lamb = np.log(eps)
-
-        # compute the new policy
+        if env_name != self._env_name:
+            self._setup_env(env_name)
+        all_advantages = _mean_advantages(observes, actions, advantages,
+                                          self.sta_num, self.act_num)
+        all_advantages += self._bias
+
+        beta = self._beta
+        if self._lamb_fn is not None:
+            self.lamb = self._lamb_fn(eps)
+
+        # compute the new policy: build the Sinkhorn kernel K[s,i,j] for all
+        # states at once, normalize its columns, and transport the old PMF
+        # through it with a single batched matrix-vector product
         old_distributions = self.distributions
-        self.distributions = [] 
-        for i in range(self.sta_num):
-            self.distributions.append(np.zeros(self.act_num))
-
-        for s in range(self.sta_num):
-            for j in range(self.act_num):
-                denom = 0
-                for k in range(self.act_num):
-                        denom += np.exp((self.lamb/beta)*all_advantages[s][k] - self.lamb*self.calc_d(k,j))
-                for i in range(self.act_num):
-                    numer = np.exp((self.lamb/beta)*all_advantages[s][i] - self.lamb*self.calc_d(i,j))
-                    self.distributions[s][i] += old_distributions[s][j]*numer/denom
-
-    def calc_d(self, ai, aj):
-        """Calculate the distance between two actions. 
-         Taxi: 
-            Actions:
-            There are 6 discrete deterministic actions:
-            - 0: move south
-            - 1: move north
-            - 2: move east 
-            - 3: move west 
-            - 4: pickup passenger
-            - 5: dropoff passenger
-        """
-        if ai == aj:
-            return 0
+        new_distributions = self._new_dist
+        new_distributions.flags.writeable = True
+        new_distributions.fill(0.0)
+        if njit is not None:
+            _sinkhorn_step(all_advantages, self.D, old_distributions,
+                           float(self.lamb), float(beta), new_distributions)
         else:
-            return 1
-
-    def get_policy(self): 
+            logK = (self.lamb/beta)*all_advantages[:, :, None] - self.lamb*self.D[None, :, :]
+            K = np.exp(logK - logK.max(axis=1, keepdims=True))
+            K /= K.sum(axis=1, keepdims=True)
+            np.einsum('sij,sj->si', K, old_distributions, out=new_distributions)
+        self.distributions, self._new_dist = new_distributions, old_distributions
+        # refresh the sampling CDF for the new policy
+        self._cdf = np.cumsum(self.distributions, axis=1)
+        self._cdf /= self._cdf[:, -1:]
+        self.distributions.flags.writeable = False
+
+    def get_policy(self):
+        # read-only view of the policy; copy before mutating
         return self.distributions
 
 class DRPolicyWass(object):
@@ -206,22 +306,55 @@ class DRPolicyWass(object):
             sta_num: number of states
             act_num: number of actions
         """
-        # initial policy PMF π(a|s): a list of 'sta_num' arrays, each array has size 'act_num'
-        # For KL constraint, PMF should not have zero 
+        # initial policy PMF π(a|s): a 'sta_num' x 'act_num' array, one row per state
+        # For KL constraint, PMF should not have zero
         self.sta_num = sta_num
         self.act_num = act_num
-        self.distributions = []
-        for i in range(sta_num):
-            self.distributions.append(np.ones(act_num)/act_num)
+        self.distributions = np.full((sta_num, act_num), 1.0/act_num, dtype=np.float32)
         self.delta = 0.01
-            
+        # pairwise action distance d(ai, aj): 0 if same action, 1 otherwise
+        self.D = 1.0 - np.eye(act_num, dtype=np.float32)
+        # scratch buffer for the next policy, swapped with distributions each update
+        self._new_dist = np.zeros((sta_num, act_num), dtype=np.float32)
+        # env-specific settings, resolved lazily on the first update
+        self._env_name = None
+        # cached per-state CDF for fast inverse-transform sampling
+        self._cdf = np.cumsum(self.distributions, axis=1)
+        self._cdf /= self._cdf[:, -1:]
+        # freeze the policy between updates to catch accidental in-place edits
+        self.distributions.flags.writeable = False
+
+    def _setup_env(self, env_name):
+        """Resolve the env-specific advantage bias and beta schedule once, so
+        update stays branch-free on env_name."""
+        self._env_name = env_name
+        self._bias = np.zeros((self.sta_num, self.act_num), dtype=np.float32)
+        self._beta_fn = None
+        if env_name == 'NChain-v0':
+            self._bias[0, 1] = 0.1
+            self._bias[1, 1] = 0.1
+            self._beta_fn = lambda: 0.8
+        elif env_name == 'Taxi-v3':
+            self._beta_fn = lambda: 2 + 0.8*(np.random.random() - 0.5)
+        elif env_name == 'CliffWalking-v0':
+            self._beta_fn = lambda: 0.5
+
     def sample(self, obs):
         """Draw sample from policy."""
-        # an array of size 'act_num'
-        distribution = self.distributions[obs];
-        # sample an action
-        action = np.random.choice(self.act_num, 1, p=distribution)
-        return action[0]
+        # inverse-transform sampling on the cached CDF row of the observed state
+        return int(np.searchsorted(self._cdf[obs], np.random.random()))
+
+    def sample_batch(self, obs):
+        """Draw one action per observation in a single vectorized call.
+
+        Args:
+            obs: observations, numpy array of size N
+
+        Returns: actions, numpy array of size N
+        """
+        obs = np.asarray(obs, dtype=np.intp)
+        r = np.random.random(len(obs))
+        return (self._cdf[obs] > r[:, None]).argmax(axis=1)
 
     def update(self, observes, actions, advantages, disc_freqs, env_name, eps):
         """ Update policy based on observations, actions and advantages
@@ -233,54 +366,28 @@ class DRPolicyWass(object):
             disc_freqs: discounted visitation frequencies, numpy array of size 'sta_num'
             env_name: name of the environment
         """
-        all_advantages = []
-        count = []
-        x = []
-        for i in range(self.sta_num):
-            all_advantages.append(np.zeros(self.act_num))
-            count.append(np.zeros(self.act_num))
-        for i in range(len(observes)):
-            all_advantages[observes[i]][actions[i]] += advantages[i]
-            count[observes[i]][actions[i]] += 1
-        for s in range(self.sta_num):
-            for i in range(self.act_num):
-                if count[s][i] != 0:
-                    all_advantages[s][i] = all_advantages[s][i]/count[s][i]
-
-        if env_name == 'NChain-v0':  
-            all_advantages[0][1] += 0.1
-            all_advantages[1][1] += 0.1
+        if env_name != self._env_name:
+            self._setup_env(env_name)
+        # disc_freqs is constant w.r.t. beta; fix its layout once so every
+        # optimizer evaluation reuses the same contiguous float64 vector
+        disc_freqs = np.ascontiguousarray(disc_freqs, dtype=np.float64)
+        all_advantages = _mean_advantages(observes, actions, advantages,
+                                          self.sta_num, self.act_num)
+        all_advantages += self._bias
+
+        def calc_scores(beta):
+            """Score A(s,aj) - β*d(aj,ai) for every (s, aj, ai), shape S x J x I."""
+            return all_advantages[:, :, None] - beta*self.D[None, :, :]
 
         def find_best_j(beta):
-            """Find argmax_j {A(s,aj) - β*d(aj,ai)}."""
-            best_j = [[0] * self.act_num for i in range(self.sta_num)]
-            for s in range(self.sta_num):
-                for i in range(self.act_num):
-                    opt_j = 0
-                    opt_val = all_advantages[s][opt_j] - beta*self.calc_d(opt_j,i)
-                    for j in range(self.act_num):
-                        cur_val = all_advantages[s][j] - beta*self.calc_d(j,i)
-                        if cur_val > opt_val:
-                            opt_j = j
-                            opt_val = cur_val
-                    best_j[s][i] = opt_j
-            return best_j
+            """Find argmax_j {A(s,aj) - β*d(aj,ai)} for all (s, ai) at once."""
+            return calc_scores(beta).argmax(axis=1)
 
         def objective(beta):
-            objective = beta*self.delta
-            best_j  =  find_best_j(beta)
-            for s in range(self.sta_num):
-                for i in range(self.act_num):
-                    opt_j = best_j[s][i]
-                    objective += disc_freqs[s]*self.distributions[s][i]*(all_advantages[s][opt_j] - beta*self.calc_d(opt_j, i))
-            return  objective
-
-        if env_name == 'Taxi-v3':
-            opt_beta = 2 + 0.8*(np.random.random() - 0.5)
-        if env_name == 'NChain-v0':
-            opt_beta = 0.8
-        if env_name == 'CliffWalking-v0':
-            opt_beta = 0.5
+            best_vals = calc_scores(beta).max(axis=1)
+            return beta*self.delta + np.sum(disc_freqs[:, None]*self.distributions*best_vals)
+
+        opt_beta = self._beta_fn()
 
         # if eps <= 1000:
         #     rranges = [(0,4)]
@@ -288,35 +395,24 @@ class DRPolicyWass(object):
         #     opt_beta = beta.x[0]
         #     print('optimal beta is: ' + str(opt_beta))
 
-        # Q
-        best_j = find_best_j(opt_beta)
-        # compute the new policy
+        # compute the new policy: each state moves the mass of action i onto
+        # its best action best_j[s][i] with one scatter-add
         old_distributions = self.distributions
-        self.distributions = []
-        for i in range(self.sta_num):
-            self.distributions.append(np.zeros(self.act_num))
-        for s in range(self.sta_num):
-            for j in range(self.act_num):
-                for i in range(self.act_num):
-                    if j == best_j[s][i]:
-                        self.distributions[s][j] += old_distributions[s][i]
-
-    def calc_d(self, ai, aj):
-        """Calculate the distance between two actions. 
-         Taxi: 
-            Actions:
-            There are 6 discrete deterministic actions:
-            - 0: move south
-            - 1: move north
-            - 2: move east 
-            - 3: move west 
-            - 4: pickup passenger
-            - 5: dropoff passenger
-        """
-        if ai == aj:
-            return 0
+        new_distributions = self._new_dist
+        new_distributions.flags.writeable = True
+        new_distributions.fill(0.0)
+        if njit is not None:
+            _wass_step(all_advantages, self.D, old_distributions,
+                       float(opt_beta), new_distributions)
         else:
-            return 1
-
-    def get_policy(self): 
+            best_j = find_best_j(opt_beta)
+            np.add.at(new_distributions, (np.arange(self.sta_num)[:, None], best_j), old_distributions)
+        self.distributions, self._new_dist = new_distributions, old_distributions
+        # refresh the sampling CDF for the new policy
+        self._cdf = np.cumsum(self.distributions, axis=1)
+        self._cdf /= self._cdf[:, -1:]
+        self.distributions.flags.writeable = False
+
+    def get_policy(self):
+        # read-only view of the policy; copy before mutating
         return self.distributions